@@ -92,6 +92,9 @@ def nb_data_wait(source: str):
         The data source.
 
     """
+    # avoid building the message if it will not be shown
+    if not get_opt("verbose") or get_opt("silent"):
+        return
     nb_markdown(f"Getting data from {source}...")
 
 
@@ -4,11 +4,17 @@
 # license information.
 # --------------------------------------------------------------------------
 """Notebooklet for Host Summary."""
-from functools import lru_cache
-from typing import Any, Optional, Iterable, Union, Dict
+from collections import OrderedDict
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Optional, Iterable, Union, Dict, List, Tuple
 
 import pandas as pd
+import requests
 from azure.common.exceptions import CloudError
+from azure.mgmt.subscription.models import Subscription
 from bokeh.models import LayoutDOM
 from bokeh.plotting.figure import Figure
 from msticpy.nbtools import nbdisplay, nbwidgets
@@ -27,6 +33,7 @@ from ....notebooklet import Notebooklet, NotebookletResult, NBMetadata
 from ....nblib.azsent.alert import browse_alerts
 from ....nblib.azsent.host import get_heartbeat, get_aznet_topology, verify_host_name
 from ....nb_metadata import read_mod_metadata, update_class_doc
+from ....options import get_opt
 from ...._version import VERSION
 
 __version__ = VERSION
@@ -37,6 +44,27 @@ _CLS_METADATA: NBMetadata
 _CELL_DOCS: Dict[str, Any]
 _CLS_METADATA, _CELL_DOCS = read_mod_metadata(__file__, __name__)
 
+logger = logging.getLogger(__name__)
+
+# Cache of Azure API results keyed by (SubscriptionId, ResourceId)
+# Values are (timestamp, result) tuples.
+_AZ_API_CACHE: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+_AZ_API_CACHE_MAX = 256
+_AZ_API_CACHE_TTL = 600  # seconds
+_AZ_API_CACHE_LOCK = threading.Lock()
+
+# Cache of related alert/bookmark query results keyed by
+# (query, weakref to qry_prov, start, end, host_name).
+# A weakref (unlike id()) never matches a new provider created after the old
+# one is garbage-collected.
+_QUERY_CACHE: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_QUERY_CACHE_MAX = 32
+
+_ARM_BATCH_API_VERSION = "2020-06-01"
+_ARM_SUB_API_VERSION = "2020-01-01"
+_ARM_VM_API_VERSION = "2020-06-01"
+_ARM_VM_PROVIDER = "/providers/microsoft.compute/virtualmachines/"
+
 
 # pylint: disable=too-few-public-methods
 class HostSummaryResult(NotebookletResult):
@@ -55,6 +83,8 @@ class HostSummaryResult(NotebookletResult):
         within the query time span.
     alert_timeline:
         Bokeh time plot of alerts recorded for host.
+        This is not created for silent runs - use the
+        notebooklet `display_alert_timeline` method.
     related_bookmarks: pd.DataFrame
         Pandas DataFrame of any investigation bookmarks
         relating to the host.
@@ -164,6 +194,7 @@ class HostSummary(Notebooklet):
             raise MsticnbMissingParameterError("timespan.")
 
         self.timespan = timespan
+        opts = frozenset(self.options or ())
 
         # pylint: disable=attribute-defined-outside-init
         result = HostSummaryResult(
@@ -186,23 +217,27 @@ class HostSummary(Notebooklet):
             host_name = host_verif.host_name
 
         host_entity = entities.Host(HostName=host_name)
-        if "heartbeat" in self.options:
+        if "heartbeat" in opts:
             host_entity = get_heartbeat(self.query_provider, host_name)
-        if "azure_net" in self.options:
-            host_entity = host_entity or entities.Host(HostName=host_name)
+        if "azure_net" in opts:
+            if host_entity is None:
+                host_entity = entities.Host(HostName=host_name)
             get_aznet_topology(
                 self.query_provider, host_entity=host_entity, host_name=host_name
             )
         # If azure_details flag is set, an encrichment provider is given,
         # and the resource is an Azure host get resource details from Azure API
 
+        host_env = getattr(host_entity, "Environment", None)
         if (
-            "azure_api" in self.options
+            "azure_api" in opts
             and "azuredata" in self.data_providers.providers
-            and ("Environment" in host_entity and host_entity.Environment == "Azure")
+            and host_env == "Azure"
         ):
             azure_api = _azure_api_details(
-                self.data_providers["azuredata"], host_entity
+                self.data_providers["azuredata"],
+                host_entity.AzureDetails["SubscriptionId"],
+                host_entity.AzureDetails["ResourceId"],
             )
             if azure_api:
                 host_entity.AzureDetails["ResourceDetails"] = azure_api[
@@ -214,17 +249,20 @@ class HostSummary(Notebooklet):
 
         result.host_entity = host_entity
 
-        if not self.silent:
-            _show_host_entity(host_entity)
-        if "alerts" in self.options:
+        _show_host_entity(host_entity, silent=self.silent)
+        if "alerts" in opts:
             related_alerts = _get_related_alerts(
                 self.query_provider, self.timespan, host_name
             )
             if len(related_alerts) > 0:
-                result.alert_timeline = _show_alert_timeline(related_alerts)
+                # get_opt returns the effective setting for this run -
+                # the run/instance "silent" value or the global option
+                result.alert_timeline = _show_alert_timeline(
+                    related_alerts, silent=get_opt("silent")
+                )
             result.related_alerts = related_alerts
 
-        if "bookmarks" in self.options:
+        if "bookmarks" in opts:
             result.related_bookmarks = _get_related_bookmarks(
                 self.query_provider, self.timespan, host_name
             )
@@ -238,90 +276,236 @@ class HostSummary(Notebooklet):
             return browse_alerts(self._last_result)
         return None
 
+    def display_alert_timeline(self):
+        """Display the alert timeline."""
+        if self.check_valid_result_data("related_alerts"):
+            return _show_alert_timeline(self._last_result.related_alerts)
+        return None
+
 
 # Get Azure Resource details from API
-@lru_cache()
-def _azure_api_details(az_cli, host_record):
+def _azure_api_details(az_cli, subscription_id: str, resource_id: str):
+    cache_key = (subscription_id, resource_id)
+    cached = _get_cached_api_details(cache_key)
+    if cached is not None:
+        return cached
     try:
-        # Get subscription details
-        sub_details = az_cli.get_subscription_info(
-            host_record.AzureDetails["SubscriptionId"]
-        )
-        # Get resource details
-        resource_details = az_cli.get_resource_details(
-            resource_id=host_record.AzureDetails["ResourceId"],
-            sub_id=host_record.AzureDetails["SubscriptionId"],
+        # Get subscription and resource details
+        sub_details, resource_details = _get_azure_api_data(
+            az_cli, subscription_id, resource_id
         )
+        props = resource_details["properties"]
+        storage = props["storageProfile"]
+        image_ref = storage.get("imageReference") or {}
         # Get details of attached disks and network interfaces
-        disks = [
-            disk["name"]
-            for disk in resource_details["properties"]["storageProfile"]["dataDisks"]
-        ]
+        disks = [disk["name"] for disk in storage["dataDisks"]]
         network_ints = [
-            net["id"]
-            for net in resource_details["properties"]["networkProfile"][
-                "networkInterfaces"
-            ]
+            net["id"] for net in props["networkProfile"]["networkInterfaces"]
         ]
-        image = (
-            str(
-                resource_details["properties"]["storageProfile"]
-                .get("imageReference", {})
-                .get("offer", {})
-            )
-            + " "
-            + str(
-                resource_details["properties"]["storageProfile"]
-                .get("imageReference", {})
-                .get("sku", {})
-            )
-        )
+        image = f"{image_ref.get('offer', '')} {image_ref.get('sku', '')}"
         # Extract key details and add host_entity
         resource_details = {
             "Azure Location": resource_details["location"],
-            "VM Size": resource_details["properties"]["hardwareProfile"]["vmSize"],
+            "VM Size": props["hardwareProfile"]["vmSize"],
             "Image": image,
             "Disks": disks,
-            "Admin User": resource_details["properties"]["osProfile"]["adminUsername"],
+            "Admin User": props["osProfile"]["adminUsername"],
             "Network Interfaces": network_ints,
             "Tags": str(resource_details["tags"]),
         }
-        return {"resoure_details": resource_details, "sub_details": sub_details}
+        az_api_details = {
+            "resoure_details": resource_details,
+            "sub_details": sub_details,
+        }
     except CloudError:
         return None
+    _cache_api_details(cache_key, az_api_details)
+    return az_api_details
+
+
+def _get_azure_api_data(
+    az_cli, subscription_id: str, resource_id: str
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return subscription and resource details, batching the ARM calls if possible."""
+    batch_results = _get_batch_api_data(az_cli, subscription_id, resource_id)
+    if batch_results:
+        return batch_results
+    # Fall back to individual calls if the batch request failed
+    sub_details = az_cli.get_subscription_info(subscription_id)
+    resource_details = az_cli.get_resource_details(
+        resource_id=resource_id, sub_id=subscription_id
+    )
+    return sub_details, resource_details
+
+
+def _get_batch_api_data(
+    az_cli, subscription_id: str, resource_id: str
+) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Return subscription and VM details from a single ARM batch request."""
+    # Only VMs have a known API version - other resource types
+    # would need an extra request to look this up.
+    if _ARM_VM_PROVIDER not in resource_id.casefold():
+        return None
+    try:
+        arm_results = _arm_batch(
+            az_cli,
+            [
+                f"/subscriptions/{subscription_id}"
+                + f"?api-version={_ARM_SUB_API_VERSION}",
+                f"{resource_id}?api-version={_ARM_VM_API_VERSION}",
+            ],
+        )
+        if not arm_results:
+            return None
+        sub_content, resource_details = arm_results
+        sub_details = _format_sub_details(Subscription.deserialize(sub_content))
+    # any failure here means that we use the non-batched API calls
+    except Exception:  # pylint: disable=broad-except
+        logger.debug("ARM batch request failed", exc_info=True)
+        return None
+    return sub_details, resource_details
+
+
+def _format_sub_details(sub: Subscription) -> Dict[str, Any]:
+    """Return subscription details in the format of AzureData.get_subscription_info."""
+    return {
+        "Subscription ID": sub.subscription_id,
+        "Display Name": sub.display_name,
+        "State": str(sub.state),
+        "Subscription Location": sub.subscription_policies.location_placement_id,
+        "Subscription Quota": sub.subscription_policies.quota_id,
+        "Spending Limit": sub.subscription_policies.spending_limit,
+    }
+
+
+def _get_arm_endpoint(az_cli) -> Optional[str]:
+    """Return the ARM endpoint used by the AzureData subscription client."""
+    sub_client = getattr(az_cli, "sub_client", None)
+    # azure-mgmt-subscription >= 1.0 (track 2) keeps the endpoint on the
+    # pipeline client, older (track 1) versions on the client config.
+    base_url = getattr(getattr(sub_client, "_client", None), "_base_url", None)
+    if not isinstance(base_url, str):
+        base_url = getattr(getattr(sub_client, "config", None), "base_url", None)
+    return base_url.rstrip("/") if isinstance(base_url, str) and base_url else None
+
+
+def _arm_batch(az_cli, rel_urls: List[str]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Execute multiple ARM GET requests as a single batch request.
+
+    Parameters
+    ----------
+    az_cli : AzureData
+        Connected AzureData provider.
+    rel_urls : List[str]
+        Relative URLs (including api-version) of the resources to get.
+
+    Returns
+    -------
+    Optional[List[Dict[str, Any]]]
+        The content of each response, in the order of `rel_urls`.
+        None if the ARM endpoint is not known or any request failed.
+
+    """
+    arm_endpoint = _get_arm_endpoint(az_cli)
+    if not az_cli.connected or not arm_endpoint:
+        logger.debug("ARM batch skipped - not connected or no ARM endpoint")
+        return None
+    batch_body = {
+        "requests": [
+            {"name": str(idx), "httpMethod": "GET", "url": f"{arm_endpoint}{rel_url}"}
+            for idx, rel_url in enumerate(rel_urls)
+        ]
+    }
+    token = az_cli.credentials.modern.get_token(f"{arm_endpoint}/.default").token
+    resp = requests.post(
+        f"{arm_endpoint}/batch?api-version={_ARM_BATCH_API_VERSION}",
+        json=batch_body,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=30,
+    )
+    if resp.status_code != 200:
+        logger.debug("ARM batch request returned status %d", resp.status_code)
+        return None
+    responses = {
+        response.get("name"): response for response in resp.json().get("responses", [])
+    }
+    results = []
+    for idx in range(len(rel_urls)):
+        response = responses.get(str(idx), {})
+        if response.get("httpStatusCode") != 200:
+            logger.debug(
+                "ARM batch item %s returned status %s",
+                rel_urls[idx],
+                response.get("httpStatusCode"),
+            )
+            return None
+        results.append(response.get("content", {}))
+    return results
+
+
+def _get_cached_api_details(cache_key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    """Return unexpired cached Azure API details for `cache_key` or None."""
+    with _AZ_API_CACHE_LOCK:
+        cached = _AZ_API_CACHE.get(cache_key)
+        if cached is None:
+            return None
+        cache_time, az_api_details = cached
+        if time.monotonic() - cache_time > _AZ_API_CACHE_TTL:
+            del _AZ_API_CACHE[cache_key]
+            return None
+        return az_api_details
+
+
+def _cache_api_details(cache_key: Tuple[str, str], az_api_details: Dict[str, Any]):
+    """Add Azure API details to the cache, evicting the oldest if full."""
+    with _AZ_API_CACHE_LOCK:
+        _AZ_API_CACHE.pop(cache_key, None)
+        while len(_AZ_API_CACHE) >= _AZ_API_CACHE_MAX:
+            del _AZ_API_CACHE[next(iter(_AZ_API_CACHE))]
+        _AZ_API_CACHE[cache_key] = (time.monotonic(), az_api_details)
 
 
 # %%
 # Get IP Information from Heartbeat
 @set_text(docs=_CELL_DOCS, key="show_host_entity")
-def _show_host_entity(host_entity):
+def _show_host_entity(host_entity, silent: bool = False):
+    if silent:
+        return
+    # nb_print only formats host_entity if verbose output is on
     nb_print(host_entity)
 
 
 # %%
 # Get related alerts
-@lru_cache()
 def _get_related_alerts(qry_prov, timespan, host_name):
-    related_alerts = qry_prov.SecurityAlert.list_related_alerts(
-        timespan, host_name=host_name
-    )
+    cache_key = _query_cache_key("alerts", qry_prov, timespan, host_name)
+    related_alerts = _get_cached_query_result(cache_key)
+    if related_alerts is None:
+        related_alerts = qry_prov.SecurityAlert.list_related_alerts(
+            timespan, host_name=host_name
+        )
+        if not related_alerts.empty:
+            # few distinct alert names, so category is cheaper to count and plot.
+            # assign returns a copy so the cached frame is never changed in place
+            related_alerts = related_alerts.assign(
+                AlertName=related_alerts["AlertName"].astype("category")
+            )
+        _cache_query_result(cache_key, related_alerts)
 
     if not related_alerts.empty:
-        host_alert_items = (
-            related_alerts[["AlertName", "TimeGenerated"]]
-            .groupby("AlertName")
-            .TimeGenerated.agg("count")
-        )
-        nb_markdown(
-            f"Found {len(related_alerts)} related alerts ({len(host_alert_items)}) types"
-        )
+        n_types = related_alerts["AlertName"].nunique()
+        nb_markdown(f"Found {len(related_alerts)} related alerts ({n_types}) types")
     else:
         nb_markdown("No related alerts found.")
     return related_alerts
 
 
 @set_text(docs=_CELL_DOCS, key="show_alert_timeline")
-def _show_alert_timeline(related_alerts):
+def _show_alert_timeline(related_alerts, silent: bool = False):
+    if silent:
+        # Nothing will be displayed, so skip building the plot
+        return None
     if len(related_alerts) > 1:
         return nbdisplay.display_timeline(
             data=related_alerts,
@@ -336,15 +520,45 @@ def _show_alert_timeline(related_alerts):
     return None
 
 
-@lru_cache()
 def _get_related_bookmarks(qry_prov, timespan, host_name):
-    nb_data_wait("Bookmarks")
-    host_bkmks = qry_prov.AzureSentinel.list_bookmarks_for_entity(
-        timespan, entity_id=f"'{host_name}'"
-    )
+    cache_key = _query_cache_key("bookmarks", qry_prov, timespan, host_name)
+    host_bkmks = _get_cached_query_result(cache_key)
+    if host_bkmks is None:
+        nb_data_wait("Bookmarks")
+        host_bkmks = qry_prov.AzureSentinel.list_bookmarks_for_entity(
+            timespan, entity_id=host_name
+        )
+        _cache_query_result(cache_key, host_bkmks)
 
     if not host_bkmks.empty:
         nb_markdown(f"{len(host_bkmks)} investigation bookmarks found for this host.")
     else:
         nb_markdown("No bookmarks found.")
     return host_bkmks
+
+
+def _query_cache_key(query: str, qry_prov, timespan: TimeSpan, host_name: str) -> tuple:
+    """Return query cache key - independent of how `timespan` was created."""
+    return (
+        query,
+        weakref.ref(qry_prov),
+        timespan.start.isoformat(),
+        timespan.end.isoformat(),
+        host_name,
+    )
+
+
+def _get_cached_query_result(cache_key: tuple) -> Optional[pd.DataFrame]:
+    """Return cached query result or None, marking the entry as recently used."""
+    if cache_key not in _QUERY_CACHE:
+        return None
+    _QUERY_CACHE.move_to_end(cache_key)
+    return _QUERY_CACHE[cache_key]
+
+
+def _cache_query_result(cache_key: tuple, data: pd.DataFrame):
+    """Add query result to the cache, evicting the oldest entry if full."""
+    _QUERY_CACHE[cache_key] = data
+    _QUERY_CACHE.move_to_end(cache_key)
+    while len(_QUERY_CACHE) > _QUERY_CACHE_MAX:
+        _QUERY_CACHE.popitem(last=False)
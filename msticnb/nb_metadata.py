@@ -11,6 +11,10 @@ import attr
 from attr import Factory
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader  # type: ignore
 
 from ._version import VERSION
 
@@ -166,7 +170,7 @@ def _read_metadata_file(mod_path):
         md_path = Path(str(mod_path).replace(".py", ".yml"))
     if md_path.is_file():
         with open(md_path, "r") as _md_file:
-            return yaml.safe_load(_md_file)
+            return yaml.load(_md_file, Loader=_YamlLoader)  # nosec
     return None
 
 
@@ -69,13 +69,13 @@ def get_opt(option: str) -> Any:
         An invalid option name was supplied.
 
     """
-    if option in _OPT_DICT:
-        if option == "silent":
-            if _OPT_DICT.get("temp_silent") is not None:
-                return _OPT_DICT.get("temp_silent")
-            return _OPT_DICT.get("silent")
+    if option == "silent":
+        temp_silent = _OPT_DICT["temp_silent"]
+        return _OPT_DICT["silent"] if temp_silent is None else temp_silent
+    try:
         return _OPT_DICT[option]
-    raise KeyError(f"Unknown option {option}.")
+    except KeyError as err:
+        raise KeyError(f"Unknown option {option}.") from err
 
 
 def set_opt(option: str, value: Any):
@@ -5,7 +5,7 @@
 # --------------------------------------------------------------------------
 """read_modules - handles reading notebooklets modules."""
 from collections import namedtuple
-from functools import partial
+from functools import lru_cache, partial
 import importlib
 import inspect
 from operator import itemgetter
@@ -92,6 +92,8 @@ def _import_from_folder(nb_folder: Path, pkg_folder: Path):
             setattr(cur_container, cls_name, nb_class)
             cls_index = "nblts." + ".".join(list(rel_folder_parts) + [cls_name])
             nb_index[cls_index] = nb_class
+    # discard any cached search results now that the index has changed
+    _find_matches.cache_clear()
 
 
 def _find_cls_modules(folder: Path, pkg_folder: Path) -> Dict[str, Notebooklet]:
@@ -213,6 +215,14 @@ def find(keywords: str, full_match=True) -> List[Tuple[str, Notebooklet]]:
     regex pattern.
 
     """
+    return list(_find_matches(keywords, full_match))
+
+
+@lru_cache(maxsize=256)
+def _find_matches(
+    keywords: str, full_match: bool
+) -> Tuple[Tuple[str, Notebooklet], ...]:
+    """Return cached search results for `find`."""
     matches = []
     for name, nb_class in nblts.iter_classes():
         all_match, match_count = nb_class.match_terms(keywords)
@@ -221,4 +231,4 @@ def find(keywords: str, full_match=True) -> List[Tuple[str, Notebooklet]]:
 
     # return list sorted by full_match, then match count, highest to lowest
     results = sorted(matches, key=itemgetter(0, 1), reverse=True)
-    return [(result[2], result[3]) for result in results]
+    return tuple((result[2], result[3]) for result in results)
@@ -5,15 +5,16 @@
 # --------------------------------------------------------------------------
 """Test the nb_template class."""
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest_check as check
 import pandas as pd
-from bokeh.models import LayoutDOM
+from bokeh.models import LayoutDOM, Spacer
 from msticnb import nblts
 from msticnb import data_providers
 from msticpy.common.timespan import TimeSpan
 from msticpy.datamodel import entities
-from msticpy.nbtools import nbwidgets
+from msticpy.nbtools import nbdisplay, nbwidgets
 
 from ....unit_test_lib import TEST_DATA_PATH, GeoIPLiteMock
 
@@ -24,6 +25,11 @@ def test_account_summary_notebooklet(monkeypatch):
     """Test basic run of notebooklet."""
     test_data = str(Path(TEST_DATA_PATH).absolute())
     monkeypatch.setattr(data_providers, "GeoLiteLookup", GeoIPLiteMock)
+    # Timeline contents are not checked - skip building the Bokeh plots
+    monkeypatch.setattr(nbdisplay, "display_timeline", lambda *args, **kwargs: Spacer())
+    # SelectItem needs display handles for its output, which IPython display
+    # only returns if there is a shell - stub it rather than creating one.
+    monkeypatch.setattr(nbwidgets, "display", MagicMock())
     data_providers.init(
         "LocalData",
         providers=["-tilookup"],
@@ -5,17 +5,25 @@
 # --------------------------------------------------------------------------
 """Test the nb_template class."""
 # from contextlib import redirect_stdout
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pandas as pd
+import pytest
 import pytest_check as check
+from azure.common.exceptions import CloudError
+from azure.mgmt.subscription import SubscriptionClient
 from msticnb import nblts
 from msticnb import data_providers
+from msticnb.nb.azsent.host import host_summary
+from msticnb.options import set_opt
 from msticpy.common.timespan import TimeSpan
 
 from ....unit_test_lib import TEST_DATA_PATH, GeoIPLiteMock
 
-# pylint: disable=no-member
+# pylint: disable=no-member, protected-access, redefined-outer-name
 
 
 def test_host_summary_notebooklet(monkeypatch):
@@ -38,3 +46,253 @@ def test_host_summary_notebooklet(monkeypatch):
     check.is_not_none(result.alert_timeline)
     check.is_not_none(result.related_bookmarks)
     check.is_instance(result.related_bookmarks, pd.DataFrame)
+
+    result = test_nb.run(value="myhost", timespan=tspan, silent=True)
+    check.is_not_none(result.related_alerts)
+    check.is_none(result.alert_timeline)
+    check.is_not_none(test_nb.display_alert_timeline())
+
+    # Silent global option
+    test_nb = nblts.azsent.host.HostSummary()
+    set_opt("silent", True)
+    try:
+        result = test_nb.run(value="myhost", timespan=tspan)
+    finally:
+        set_opt("silent", False)
+    check.is_not_none(result.related_alerts)
+    check.is_none(result.alert_timeline)
+
+
+_SUB_ID = "12345678-1234-1234-1234-123456789012"
+_VM_ID = (
+    f"/subscriptions/{_SUB_ID}/resourceGroups/rg1/providers"
+    + "/Microsoft.Compute/virtualMachines/{vm}"
+)
+_VM_RESOURCE = {
+    "location": "eastus",
+    "tags": {"env": "test"},
+    "properties": {
+        "hardwareProfile": {"vmSize": "Standard_D2s_v3"},
+        "storageProfile": {
+            "imageReference": {"offer": "UbuntuServer", "sku": "18.04-LTS"},
+            "dataDisks": [{"name": "disk1"}],
+        },
+        "osProfile": {"adminUsername": "azadmin"},
+        "networkProfile": {"networkInterfaces": [{"id": "nic1"}]},
+    },
+}
+
+
+@pytest.fixture
+def az_cli(monkeypatch):
+    """Return mock AzureData provider using the non-batched API calls."""
+    monkeypatch.setattr(host_summary, "_AZ_API_CACHE", {})
+    az_data = MagicMock()
+    az_data.connected = False
+    az_data.get_subscription_info.return_value = {"Subscription ID": _SUB_ID}
+    az_data.get_resource_details.return_value = _VM_RESOURCE
+    return az_data
+
+
+def test_azure_api_cache_hit(az_cli):
+    """Test repeated Azure API lookups are served from the cache."""
+    vm_id = _VM_ID.format(vm="vm1")
+    az_details = host_summary._azure_api_details(az_cli, _SUB_ID, vm_id)
+    check.equal(az_details["resoure_details"]["VM Size"], "Standard_D2s_v3")
+    check.equal(az_details["resoure_details"]["Image"], "UbuntuServer 18.04-LTS")
+    check.equal(az_details["resoure_details"]["Disks"], ["disk1"])
+    check.equal(az_details["sub_details"], {"Subscription ID": _SUB_ID})
+
+    check.equal(host_summary._azure_api_details(az_cli, _SUB_ID, vm_id), az_details)
+    check.equal(az_cli.get_resource_details.call_count, 1)
+    check.equal(az_cli.get_subscription_info.call_count, 1)
+
+
+def test_azure_api_cache_expiry(az_cli, monkeypatch):
+    """Test Azure API cache entries expire after the TTL."""
+    monkeypatch.setattr(host_summary, "_AZ_API_CACHE_TTL", -1)
+    vm_id = _VM_ID.format(vm="vm1")
+    host_summary._azure_api_details(az_cli, _SUB_ID, vm_id)
+    host_summary._azure_api_details(az_cli, _SUB_ID, vm_id)
+    check.equal(az_cli.get_resource_details.call_count, 2)
+
+
+def test_azure_api_cache_eviction(az_cli, monkeypatch):
+    """Test oldest Azure API cache entry is evicted when the cache is full."""
+    monkeypatch.setattr(host_summary, "_AZ_API_CACHE_MAX", 2)
+    for vm_name in ("vm1", "vm2", "vm3"):
+        host_summary._azure_api_details(az_cli, _SUB_ID, _VM_ID.format(vm=vm_name))
+    check.equal(len(host_summary._AZ_API_CACHE), 2)
+    check.is_not_in((_SUB_ID, _VM_ID.format(vm="vm1")), host_summary._AZ_API_CACHE)
+    check.is_in((_SUB_ID, _VM_ID.format(vm="vm3")), host_summary._AZ_API_CACHE)
+
+
+def test_azure_api_cloud_error_not_cached(az_cli):
+    """Test failed Azure API lookups are not cached."""
+    az_cli.get_subscription_info.side_effect = CloudError(MagicMock(), error="fail")
+    vm_id = _VM_ID.format(vm="vm1")
+    check.is_none(host_summary._azure_api_details(az_cli, _SUB_ID, vm_id))
+    check.equal(len(host_summary._AZ_API_CACHE), 0)
+
+
+_SUB_CONTENT = {
+    "subscriptionId": _SUB_ID,
+    "displayName": "Test subscription",
+    "state": "Enabled",
+    "subscriptionPolicies": {
+        "locationPlacementId": "Public_2014-09-01",
+        "quotaId": "PayAsYouGo_2014-09-01",
+        "spendingLimit": "Off",
+    },
+}
+
+
+@pytest.fixture
+def batch_az_cli(az_cli, monkeypatch):
+    """Return mock AzureData provider and mock batch request."""
+    az_cli.connected = True
+    az_cli.sub_client = SubscriptionClient(credential=MagicMock())
+    az_cli.credentials.modern.get_token.return_value.token = "token"
+    batch_resp = MagicMock()
+    batch_resp.status_code = 200
+    # responses are matched to requests by name, not position
+    batch_resp.json.return_value = {
+        "responses": [
+            {"name": "1", "httpStatusCode": 200, "content": _VM_RESOURCE},
+            {"name": "0", "httpStatusCode": 200, "content": _SUB_CONTENT},
+        ]
+    }
+    mock_post = MagicMock(return_value=batch_resp)
+    monkeypatch.setattr(host_summary.requests, "post", mock_post)
+    return az_cli, mock_post
+
+
+def test_azure_api_batch(batch_az_cli):
+    """Test Azure API details retrieved with a single batch request."""
+    az_cli, mock_post = batch_az_cli
+    vm_id = _VM_ID.format(vm="vm1")
+    az_details = host_summary._azure_api_details(az_cli, _SUB_ID, vm_id)
+
+    check.equal(mock_post.call_count, 1)
+    check.equal(
+        mock_post.call_args[0][0],
+        "https://management.azure.com/batch?api-version=2020-06-01",
+    )
+    batch_urls = [req["url"] for req in mock_post.call_args[1]["json"]["requests"]]
+    check.equal(
+        batch_urls,
+        [
+            f"https://management.azure.com/subscriptions/{_SUB_ID}"
+            + "?api-version=2020-01-01",
+            f"https://management.azure.com{vm_id}?api-version=2020-06-01",
+        ],
+    )
+    az_cli.credentials.modern.get_token.assert_called_once_with(
+        "https://management.azure.com/.default"
+    )
+    check.equal(az_cli.get_subscription_info.call_count, 0)
+    check.equal(az_cli.get_resource_details.call_count, 0)
+    check.equal(az_details["sub_details"]["Subscription ID"], _SUB_ID)
+    check.equal(az_details["sub_details"]["State"], "Enabled")
+    check.equal(az_details["sub_details"]["Spending Limit"], "Off")
+    check.equal(az_details["resoure_details"]["Network Interfaces"], ["nic1"])
+
+
+@pytest.mark.parametrize("failure", ["status", "item_status", "token", "not_vm"])
+def test_azure_api_batch_fallback(batch_az_cli, failure):
+    """Test Azure API details use individual calls if batching fails."""
+    az_cli, mock_post = batch_az_cli
+    vm_id = _VM_ID.format(vm="vm1")
+    if failure == "status":
+        mock_post.return_value.status_code = 404
+    elif failure == "item_status":
+        responses = mock_post.return_value.json.return_value["responses"]
+        responses[0]["httpStatusCode"] = 403
+    elif failure == "token":
+        az_cli.credentials.modern.get_token.side_effect = RuntimeError("no token")
+    else:
+        vm_id = vm_id.replace("virtualMachines", "virtualMachineScaleSets")
+    az_details = host_summary._azure_api_details(az_cli, _SUB_ID, vm_id)
+
+    check.equal(az_cli.get_subscription_info.call_count, 1)
+    check.equal(az_cli.get_resource_details.call_count, 1)
+    check.equal(az_details["sub_details"], {"Subscription ID": _SUB_ID})
+    check.equal(az_details["resoure_details"]["VM Size"], "Standard_D2s_v3")
+
+
+def test_azure_api_batch_fallback_logged(batch_az_cli, caplog):
+    """Test a failed batch request is logged at debug level."""
+    az_cli, _ = batch_az_cli
+    az_cli.credentials.modern.get_token.side_effect = RuntimeError("no token")
+    with caplog.at_level("DEBUG", logger=host_summary.__name__):
+        host_summary._azure_api_details(az_cli, _SUB_ID, _VM_ID.format(vm="vm1"))
+    check.is_in("ARM batch request failed", caplog.text)
+
+
+def test_get_arm_endpoint():
+    """Test ARM endpoint is read from track 1 and track 2 subscription clients."""
+    az_cli = MagicMock(spec=["sub_client"])
+    az_cli.sub_client = SubscriptionClient(credential=MagicMock())
+    check.equal(host_summary._get_arm_endpoint(az_cli), "https://management.azure.com")
+    az_cli.sub_client = SubscriptionClient(
+        credential=MagicMock(), base_url="https://management.usgovcloudapi.net/"
+    )
+    check.equal(
+        host_summary._get_arm_endpoint(az_cli), "https://management.usgovcloudapi.net"
+    )
+    az_cli.sub_client = MagicMock(spec=["config"])
+    az_cli.sub_client.config.base_url = "https://management.chinacloudapi.cn/"
+    check.equal(
+        host_summary._get_arm_endpoint(az_cli), "https://management.chinacloudapi.cn"
+    )
+    az_cli.sub_client = None
+    check.is_none(host_summary._get_arm_endpoint(az_cli))
+
+
+@pytest.fixture
+def qry_prov(monkeypatch):
+    """Return mock query provider with an empty related query cache."""
+    monkeypatch.setattr(host_summary, "_QUERY_CACHE", OrderedDict())
+    qry_prov = MagicMock()
+    qry_prov.SecurityAlert.list_related_alerts.return_value = pd.DataFrame(
+        {"AlertName": ["alert1", "alert2", "alert1"]}
+    )
+    return qry_prov
+
+
+def test_related_alerts_cache_timespan(qry_prov):
+    """Test equal TimeSpans created in different ways share a cache entry."""
+    start = datetime(2020, 11, 1, 12, 0, 0)
+    end = datetime(2020, 11, 2, 12, 0, 0)
+    for tspan in (
+        TimeSpan(start=start, end=end),
+        TimeSpan(start=start.isoformat(), end=end.isoformat()),
+        TimeSpan(end=end, period="1D"),
+    ):
+        alerts = host_summary._get_related_alerts(qry_prov, tspan, "myhost")
+        check.equal(len(alerts), 3)
+    check.equal(qry_prov.SecurityAlert.list_related_alerts.call_count, 1)
+
+
+def test_related_alerts_cache_provider(qry_prov):
+    """Test cached results are not returned for a different query provider."""
+    tspan = TimeSpan(end=datetime(2020, 11, 2), period="1D")
+    host_summary._get_related_alerts(qry_prov, tspan, "myhost")
+    new_prov = MagicMock()
+    new_prov.SecurityAlert.list_related_alerts.return_value = pd.DataFrame(
+        {"AlertName": ["alert3"]}
+    )
+    alerts = host_summary._get_related_alerts(new_prov, tspan, "myhost")
+    check.equal(len(alerts), 1)
+    check.equal(new_prov.SecurityAlert.list_related_alerts.call_count, 1)
+
+
+def test_related_alerts_category_copy(qry_prov):
+    """Test AlertName is categorical without changing the queried frame."""
+    query_result = qry_prov.SecurityAlert.list_related_alerts.return_value
+    tspan = TimeSpan(end=datetime(2020, 11, 2), period="1D")
+    alerts = host_summary._get_related_alerts(qry_prov, tspan, "myhost")
+    check.equal(alerts["AlertName"].dtype.name, "category")
+    check.equal(query_result["AlertName"].dtype.name, "object")
+    cached = host_summary._get_related_alerts(qry_prov, tspan, "myhost")
+    check.is_(cached, alerts)
@@ -6,12 +6,13 @@
 """common test class."""
 from contextlib import redirect_stdout
 import io
+from unittest.mock import MagicMock
 import warnings
 
 import pytest
 import pytest_check as check
 from msticnb.common import add_result, nb_data_wait, nb_debug, nb_print
-from msticnb import options, init
+from msticnb import common, options, init
 from msticnb.options import get_opt, set_opt
 from .nb_test import TstNBSummary
 
@@ -21,30 +22,52 @@ from .nb_test import TstNBSummary
 def test_print_methods():
     """Test method."""
     set_opt("verbose", True)
-    f_stream = io.StringIO()
-    with redirect_stdout(f_stream):
-        nb_print("status")
-        nb_data_wait("table1")
-    check.is_in("status", str(f_stream.getvalue()))
-    check.is_in("Getting data from table1", str(f_stream.getvalue()))
+    with io.StringIO() as f_stream:
+        with redirect_stdout(f_stream):
+            nb_print("status")
+            nb_data_wait("table1")
+        output = f_stream.getvalue()
+    check.is_in("status", output)
+    check.is_in("Getting data from table1", output)
 
     set_opt("verbose", False)
-    f_stream = io.StringIO()
-    with redirect_stdout(f_stream):
-        nb_print("status")
-    check.is_not_in("status", str(f_stream.getvalue()))
-    check.is_not_in("Getting data from table1", str(f_stream.getvalue()))
+    with io.StringIO() as f_stream:
+        with redirect_stdout(f_stream):
+            nb_print("status")
+            nb_data_wait("table1")
+        output = f_stream.getvalue()
+    check.is_not_in("status", output)
+    check.is_not_in("Getting data from table1", output)
 
     set_opt("debug", True)
-    f_stream = io.StringIO()
-    with redirect_stdout(f_stream):
-        nb_debug("debug", "debugmssg", "val", 1, "result", True)
-    check.is_in("debug", str(f_stream.getvalue()))
-    check.is_in("debugmssg", str(f_stream.getvalue()))
-    check.is_in("val", str(f_stream.getvalue()))
-    check.is_in("1", str(f_stream.getvalue()))
-    check.is_in("result", str(f_stream.getvalue()))
-    check.is_in("True", str(f_stream.getvalue()))
+    with io.StringIO() as f_stream:
+        with redirect_stdout(f_stream):
+            nb_debug("debug", "debugmssg", "val", 1, "result", True)
+        output = f_stream.getvalue()
+    check.is_in("debug", output)
+    check.is_in("debugmssg", output)
+    check.is_in("val", output)
+    check.is_in("1", output)
+    check.is_in("result", output)
+    check.is_in("True", output)
+
+
+def test_nb_data_wait_ipython(monkeypatch):
+    """Test nb_data_wait only displays markdown if verbose in IPython."""
+    mock_md = MagicMock()
+    monkeypatch.setattr(common, "_IP_AVAILABLE", True)
+    monkeypatch.setattr(common.mp_utils, "md", mock_md)
+    verbose = get_opt("verbose")
+    try:
+        set_opt("verbose", False)
+        nb_data_wait("table1")
+        mock_md.assert_not_called()
+
+        set_opt("verbose", True)
+        nb_data_wait("table1")
+        mock_md.assert_called_once_with("Getting data from table1...")
+    finally:
+        set_opt("verbose", verbose)
 
 
 def test_add_result_decorator():
@@ -68,17 +91,17 @@ def test_add_result_decorator():
 def test_options():
     """Test method."""
     set_opt("verbose", True)
-    f_stream = io.StringIO()
-    with redirect_stdout(f_stream):
-        options.current()
-    check.is_in("verbose: True", str(f_stream.getvalue()))
-
-    f_stream = io.StringIO()
-    with redirect_stdout(f_stream):
-        options.show()
-    check.is_in(
-        "verbose (default=True): Show progress messages.", str(f_stream.getvalue())
-    )
+    with io.StringIO() as f_stream:
+        with redirect_stdout(f_stream):
+            options.current()
+        output = f_stream.getvalue()
+    check.is_in("verbose: True", output)
+
+    with io.StringIO() as f_stream:
+        with redirect_stdout(f_stream):
+            options.show()
+        output = f_stream.getvalue()
+    check.is_in("verbose (default=True): Show progress messages.", output)
 
     with pytest.raises(KeyError):
         get_opt("no_option")
@@ -91,43 +114,44 @@ def test_options():
 
 
 def _capture_nb_run_output(test_nb, **kwargs):
-    f_stream = io.StringIO()
-    with redirect_stdout(f_stream):
-        test_nb.run(**kwargs)
-    return str(f_stream.getvalue())
+    with io.StringIO() as f_stream:
+        with redirect_stdout(f_stream):
+            test_nb.run(**kwargs)
+        return f_stream.getvalue()
 
 
 def test_silent_option():
     """Test operation of 'silent' option."""
-    warnings.filterwarnings(action="ignore", category=UserWarning)
-    init(query_provider="LocalData", providers=[])
-    test_nb = TstNBSummary()
-
-    output = _capture_nb_run_output(test_nb)
-    check.is_true(output)
-
-    # Silent option to run
-    output = _capture_nb_run_output(test_nb, silent=True)
-    check.is_false(output)
-    check.is_true(get_opt("silent"))
-
-    # Silent option to init
-    test_nb = TstNBSummary(silent=True)
-    check.is_true(test_nb.silent)
-    output = _capture_nb_run_output(test_nb)
-    check.is_false(output)
-
-    # But overridable on run
-    output = _capture_nb_run_output(test_nb, silent=False)
-    check.is_true(output)
-    check.is_false(get_opt("silent"))
-
-    # Silent global option
-    set_opt("silent", True)
-    test_nb = TstNBSummary()
-    output = _capture_nb_run_output(test_nb)
-    check.is_false(output)
-
-    # But overridable on run
-    output = _capture_nb_run_output(test_nb, silent=False)
-    check.is_true(output)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=UserWarning)
+        init(query_provider="LocalData", providers=[])
+        test_nb = TstNBSummary()
+
+        output = _capture_nb_run_output(test_nb)
+        check.is_true(output)
+
+        # Silent option to run
+        output = _capture_nb_run_output(test_nb, silent=True)
+        check.is_false(output)
+        check.is_true(get_opt("silent"))
+
+        # Silent option to init
+        test_nb = TstNBSummary(silent=True)
+        check.is_true(test_nb.silent)
+        output = _capture_nb_run_output(test_nb)
+        check.is_false(output)
+
+        # But overridable on run
+        output = _capture_nb_run_output(test_nb, silent=False)
+        check.is_true(output)
+        check.is_false(get_opt("silent"))
+
+        # Silent global option
+        set_opt("silent", True)
+        test_nb = TstNBSummary()
+        output = _capture_nb_run_output(test_nb)
+        check.is_false(output)
+
+        # But overridable on run
+        output = _capture_nb_run_output(test_nb, silent=False)
+        check.is_true(output)
@@ -7,9 +7,12 @@
 from pathlib import Path
 
 import pytest_check as check
+from msticnb import read_modules
 from msticnb.read_modules import discover_modules, Notebooklet, find, nblts, nb_index
 from .unit_test_lib import TEST_DATA_PATH
 
+# pylint: disable=protected-access
+
 
 def test_read_modules():
     """Test method."""
@@ -52,3 +55,20 @@ def test_read_custom_path():
     check.equal(len(find_res), 1)
     check.equal(find_res[0][0], "CustomNB")
     check.is_in("nblts.host.CustomNB", nb_index)
+
+
+def test_find_after_discover(monkeypatch):
+    """Test find results are refreshed when new notebooklets are discovered."""
+    # remove any custom notebooklets discovered by other tests
+    monkeypatch.delattr(nblts, "custom_nb", raising=False)
+    read_modules._find_matches.cache_clear()
+    try:
+        check.equal(len(find("<<Test Marker>>")), 0)
+
+        cust_nb_path = Path(TEST_DATA_PATH) / "custom_nb"
+        discover_modules(nb_path=str(cust_nb_path))
+        find_res = find("<<Test Marker>>")
+        check.equal(len(find_res), 1)
+        check.equal(find_res[0][0], "CustomNB")
+    finally:
+        read_modules._find_matches.cache_clear()